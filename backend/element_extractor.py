@@ -1,129 +1,397 @@
+import functools
 import re
+from collections import OrderedDict, namedtuple
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Any
+try:
+    import ahocorasick  # pyahocorasick - C-level multi-pattern matching
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
+    ahocorasick = None
 
-# Regex for ALL CAPS detection (character names in scripts)
-ALLCAP_RE = re.compile(r'^[A-ZА-ЯЁ\s\-]{2,}$')
+try:
+    import spacy
+    HAS_SPACY = True
+except ImportError:
+    HAS_SPACY = False
+    spacy = None
+
+try:
+    from natasha import Segmenter, NewsEmbedding, NewsNERTagger, Doc as NatashaDoc
+    HAS_NATASHA = True
+except ImportError:
+    HAS_NATASHA = False
+
+# Rejects anything outside the ALL-CAPS name alphabet; paired with
+# str.isupper() this classifies lines without running a full-line regex
+NON_ALLCAP_RE = re.compile(r'[^A-ZА-ЯЁ\s\-]')
+
+# Time-of-day dispatch: group names double as the canonical labels, and
+# the word boundaries keep substrings like "день" in "деньги" from
+# matching. The "other" group carries words without a canonical form.
+TOD_RE = re.compile(
+    r'\b(?:(?P<Ночь>ночью|ночное|ночь)'
+    r'|(?P<День>дневное|день)'
+    r'|(?P<Утро>утром|утро)'
+    r'|(?P<Вечер>вечером|вечер)'
+    r'|(?P<other>рассвет|сумерки|полдень))\b'
+)
+
+_NatashaBundle = namedtuple('_NatashaBundle', ['segmenter', 'ner_tagger'])
+
+
+@dataclass(slots=True)
+class _ExtractionContext:
+    """Per-scene shared state so no extractor recomputes derived text."""
+    text: str
+    lower: str
+    lines: tuple
+
+
+@functools.lru_cache(maxsize=1)
+def _load_spacy():
+    """Load the NER-only spaCy pipeline once per process.
+
+    Every ElementExtractor shares this instance - reloading the model per
+    extractor would multiply seconds of startup and hundreds of MB of RAM.
+    """
+    if not HAS_SPACY:
+        return None
+    try:
+        # Only NER is used (PER entities) - excluding the other
+        # components skips loading their weights entirely.
+        return spacy.load(
+            "ru_core_news_sm",
+            exclude=["tagger", "morphologizer", "parser",
+                     "attribute_ruler", "lemmatizer"]
+        )
+    except OSError:
+        print("Warning: spaCy model ru_core_news_sm not found, "
+              "character extraction uses heuristics only")
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _load_natasha():
+    """Build the Natasha bundle once per process (None when unavailable)."""
+    if not HAS_NATASHA:
+        return None
+    try:
+        return _NatashaBundle(Segmenter(), NewsNERTagger(NewsEmbedding()))
+    except Exception as e:
+        print(f"Warning: Natasha NER unavailable: {e}")
+        return None
 
 # Keyword sets
-LOCATION_KEYWORDS = {
+LOCATION_KEYWORDS = frozenset({
     "улица", "кабинет", "коридор", "зал", "кафе", "ресторан", "дом", 
     "площадь", "станция", "больница", "офис", "квартира", "комната",
     "парк", "сквер", "берег", "лед", "море", "океан", "пролив",
     "кают-компания", "каюткомпания", "палуба", "радиорубка", 
     "машинное отделение", "корабль", "судно", "пароход"
-}
+})
 
-TIME_KEYWORDS = {
+TIME_KEYWORDS = frozenset({
     "утро", "день", "вечер", "ночь", "рассвет", "сумерки", 
     "полдень", "ночью", "утром", "вечером", "дневное", "ночное"
-}
+})
 
-MASS_KEYWORDS = {
+MASS_KEYWORDS = frozenset({
     "толпа", "массовка", "зрители", "прохожие", "официанты", 
     "публика", "люди", "студенты", "экипаж", "челюскинцы"
-}
+})
 
-PROP_KEYWORDS = {
+PROP_KEYWORDS = frozenset({
     "автомобиль", "машина", "велосипед", "стол", "стул", "часы", 
     "пистолет", "телефон", "радио", "инструмент", "инструменты",
     "ноутбук", "компьютер", "деньги", "кошелек", "ключи", 
     "документы", "книга", "сигареты", "кольцо", "ружье",
     "поднос", "шкура", "потефон", "бутылки", "стаканы", "набросок",
     "фотоаппарат", "журнал", "докладная", "пианино", "накладка"
-}
+})
 
-ANIMAL_KEYWORDS = {
+ANIMAL_KEYWORDS = frozenset({
     "животное", "собака", "кошка", "лошадь", "животные",
     "собаки", "кошки", "звездочка"
-}
+})
 
-VEHICLE_KEYWORDS = {
+VEHICLE_KEYWORDS = frozenset({
     "автомобиль", "машина", "авто", "такси", "автобус",
     "трамвай", "метро", "поезд", "мотоцикл"
-}
+})
 
-SFX_KEYWORDS = {
+SFX_KEYWORDS = frozenset({
     "взрыв", "пожар", "касание", "эффект", "CGI", "свет", "дым", "ветер",
     "снег", "молния", "дождь", "пиротехника"
-}
+})
 
-STUNT_KEYWORDS = {
+STUNT_KEYWORDS = frozenset({
     "трюк", "каскадёр", "каскадер", "трюки"
-}
+})
 
-EQUIPMENT_KEYWORDS = {
+EQUIPMENT_KEYWORDS = frozenset({
     "коптер", "дрон", "камера", "объектив", "микрофон",
     "освещение", "подъемник", "кран", "хромакей", "хейзер"
-}
+})
+
+INTERIOR_KEYWORDS = frozenset({
+    "кабинет", "комната", "дом", "квартира", "офис", "клуб",
+    "кафе", "ресторан", "кают-компания", "радиорубка"
+})
+
+EXTERIOR_KEYWORDS = frozenset({
+    "улица", "площадь", "парк", "сквер", "на улице",
+    "на площади", "берег", "море", "лед"
+})
 
 class ElementExtractor:
     """Extract production elements using keyword-based approach."""
-    
+
+    __slots__ = (
+        'natasha_person_threshold', 'nlp', '_natasha_cache', '_result_cache',
+        '_keyword_categories', 'category_ac', '_all_kw_re',
+        '_script_re', '_ship_re',
+    )
+
+    # Shooting scripts repeat near-identical blocks (montages, reshoots)
+    # and users re-upload files; memoizing extract_all makes those free.
+    RESULT_CACHE_SIZE = 1024
+
+    CATEGORY_KEYWORDS = (
+        ('location', LOCATION_KEYWORDS),
+        ('props', PROP_KEYWORDS),
+        ('vehicles', VEHICLE_KEYWORDS),
+        ('sfx', SFX_KEYWORDS),
+        ('stunt', STUNT_KEYWORDS),
+        ('animals', ANIMAL_KEYWORDS),
+        ('equipment', EQUIPMENT_KEYWORDS),
+        ('mass', MASS_KEYWORDS),
+        ('interior', INTERIOR_KEYWORDS),
+        ('exterior', EXTERIOR_KEYWORDS),
+    )
+
+    def __init__(self, natasha_person_threshold: int = 2, preload: bool = False):
+        """
+        Args:
+            natasha_person_threshold: run Natasha NER only when spaCy found
+                fewer than this many persons (spaCy alone usually suffices)
+            preload: build the Natasha bundle eagerly (server warmup)
+                instead of on first use
+        """
+        self.natasha_person_threshold = natasha_person_threshold
+        self._init_keywords()
+
+        # spaCy NER augments the ALL-CAPS heuristic for character names.
+        # The model is a process-wide singleton; see _load_spacy.
+        self.nlp = _load_spacy()
+
+        # One-slot cache: extract_characters and extract_location both need
+        # the tagged Doc for the same scene - build it once per scene.
+        self._natasha_cache = (None, None)
+        self._result_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        if preload:
+            _ = self.natasha
+
+    def _init_keywords(self):
+        """Build the keyword matchers once.
+
+        All category keywords go into a single automaton (or one union
+        alternation regex as fallback), so extract_all classifies every
+        hit in one pass over the scene text.
+        """
+        # Keywords shared between categories (e.g. "машина") carry
+        # multiple tags; both the automaton and the regex fallback below
+        # classify hits through this map in a single pass over the text.
+        self._keyword_categories: Dict[str, tuple] = {}
+        for category, keywords in self.CATEGORY_KEYWORDS:
+            for kw in keywords:
+                self._keyword_categories[kw] = (
+                    self._keyword_categories.get(kw, ()) + (category,))
+
+        if HAS_AHOCORASICK:
+            self.category_ac = ahocorasick.Automaton()
+            for kw, categories in self._keyword_categories.items():
+                self.category_ac.add_word(kw, (kw, categories))
+            self.category_ac.make_automaton()
+        else:
+            self.category_ac = None
+        # Union alternation over every category keyword - the fallback
+        # needs one sweep instead of one per category.
+        self._all_kw_re = self._compile_keywords(set(self._keyword_categories))
+
+        # Location regexes, compiled once. The script-format pattern is
+        # anchored to line starts (with an optional scene-number prefix),
+        # so the search stops at the header instead of walking the body.
+        # The sub-object group excludes a trailing time-of-day marker
+        # directly (negative lookahead after the dash), so no second
+        # strip pass runs over the captured value.
+        self._script_re = re.compile(
+            r'^(?:\d+[\.\)][ \t]*)?([А-ЯЁ][А-ЯЁ \t\-]+)\.[ \t]*'
+            r'([А-ЯЁ][А-ЯЁ \t\-]+?'
+            r'(?:[ \t]*[–\-](?![ \t]*(?:ДЕНЬ|НОЧЬ|УТРО|ВЕЧЕР)\b)[ \t]*[А-ЯЁ \t]+)?)'
+            r'(?:[ \t]*[–\-][ \t]*(?:ДЕНЬ|НОЧЬ|УТРО|ВЕЧЕР))?'
+            r'(?:[^А-ЯЁ \t\n][^\n]*)?$',
+            re.MULTILINE
+        )
+        self._ship_re = re.compile(r'\b(ЧЕЛЮСКИН|КОРАБЛЬ|СУДНО|ПАРОХОД)\b',
+                                   re.IGNORECASE)
+
+    @staticmethod
+    def _compile_keywords(keywords_set: set):
+        """Build a single alternation regex for a keyword set (longest first)."""
+        alternation = '|'.join(re.escape(kw) for kw in sorted(keywords_set, key=len, reverse=True))
+        return re.compile(alternation)
+
+    def _scan_categories(self, text_lower: str) -> Dict[str, List[str]]:
+        """Bucket keyword hits for every category in a single text pass.
+
+        Uses the combined automaton when available (iter_long keeps the
+        longest-match semantics of the regex path); the fallback runs one
+        union alternation sweep and dispatches via the category map.
+        """
+        # Dicts dedupe in O(1) per hit while preserving first-seen order
+        buckets = {category: {} for category, _ in self.CATEGORY_KEYWORDS}
+
+        if self.category_ac is not None:
+            hits = (payload for _, payload in self.category_ac.iter_long(text_lower))
+        else:
+            hits = ((m.group(0), self._keyword_categories[m.group(0)])
+                    for m in self._all_kw_re.finditer(text_lower))
+
+        for kw, categories in hits:
+            for category in categories:
+                buckets[category][kw] = None
+
+        return {category: list(found) for category, found in buckets.items()}
+
     def normalize_word(self, word: str) -> str:
         """Normalize word for matching."""
         return word.strip().lower()
     
-    def extract_characters(self, scene_text: str) -> List[str]:
+    def extract_characters(self, scene_text: str, spacy_doc=None,
+                           lines: Optional[tuple] = None) -> List[str]:
         """
         Heuristic: lines in ALL CAPS often denote character names.
+        spaCy PER entities are added when the model is available.
         Returns unique list in order of appearance.
         """
         names = []
-        
-        for line in scene_text.splitlines():
+
+        if lines is None:
+            lines = scene_text.splitlines()
+        # Bind the per-line lookups once - this loop runs for every line
+        # of every scene
+        non_allcap_search = NON_ALLCAP_RE.search
+        append_name = names.append
+        for line in lines:
             s = line.strip()
             if not s or len(s) < 2:
                 continue
-            
-            # Detect all-caps lines that are short (likely character headings)
-            if ALLCAP_RE.match(s) and len(s.split()) <= 4:
+
+            # Detect all-caps lines that are short (likely character
+            # headings). isupper() rejects ~all non-heading lines in C
+            # before any regex work runs; it also requires at least one
+            # cased letter, so bare dashes no longer pass as names.
+            if s.isupper() and len(s.split()) <= 4 and not non_allcap_search(s):
                 # Title case for readability
-                names.append(s.title())
-        
-        # Remove duplicates while preserving order
-        seen = set()
-        out = []
-        for n in names:
-            if n.lower() not in seen:
-                seen.add(n.lower())
-                out.append(n)
-        
-        return out
+                append_name(s.title())
+
+        spacy_names = self._spacy_persons(scene_text, spacy_doc)
+        names.extend(spacy_names)
+
+        # Natasha is the heavier pipeline - only run it when spaCy coverage
+        # looks thin (or spaCy is unavailable, in which case it found 0).
+        if len(spacy_names) < self.natasha_person_threshold:
+            names.extend(self._natasha_persons(scene_text))
+
+        # Remove duplicates while preserving order. Every source above
+        # title-cases its names, so exact-key dedupe in one C-level pass
+        # keeps the old case-insensitive semantics.
+        return list(dict.fromkeys(names))
     
+    def _spacy_persons(self, text: str, spacy_doc=None) -> List[str]:
+        """PER entities from spaCy, title-cased. Empty without the model."""
+        if spacy_doc is None:
+            if self.nlp is None:
+                return []
+            spacy_doc = self.nlp(text)
+        return [ent.text.title() for ent in spacy_doc.ents if ent.label_ == 'PER']
+
+    @property
+    def natasha(self):
+        """Lazily built, process-wide Natasha bundle or None."""
+        return _load_natasha()
+
+    def _natasha_doc(self, text: str):
+        """Segment and NER-tag text once, reusing the result for the scene.
+
+        The expensive part is tagging; caching the Doc lets characters and
+        location extraction share a single NER pass per scene.
+        """
+        bundle = self.natasha
+        if bundle is None:
+            return None
+        cached_text, cached_doc = self._natasha_cache
+        if cached_text is text:
+            return cached_doc
+        doc = NatashaDoc(text)
+        doc.segment(bundle.segmenter)
+        doc.tag_ner(bundle.ner_tagger)
+        self._natasha_cache = (text, doc)
+        return doc
+
+    def _natasha_persons(self, text: str) -> List[str]:
+        """PER spans from Natasha, title-cased. Empty without the tagger."""
+        doc = self._natasha_doc(text)
+        if doc is None:
+            return []
+        return [span.text.title() for span in doc.spans if span.type == 'PER']
+
     def extract_keywords_from_set(self, scene_text: str, keywords_set: set) -> List[str]:
         """Extract keywords from text by exact matching."""
-        text_lower = scene_text.lower()
+        return self._keywords_from_set(scene_text.lower(), keywords_set)
+
+    def _keywords_from_set(self, text_lower: str, keywords_set: set) -> List[str]:
+        """Exact keyword matching against already-lowercased text."""
         found = []
-        
+
         for kw in keywords_set:
             if kw in text_lower and kw not in found:
                 found.append(kw)
-        
+
         return found
     
-    def extract_location(self, text: str) -> Dict[str, Optional[str]]:
-        """Extract location (object and sub-object) from scene text."""
+    def extract_location(self, text: str, text_lower: Optional[str] = None,
+                         locations: Optional[List[str]] = None) -> Dict[str, Optional[str]]:
+        """Extract location (object and sub-object) from scene text.
+
+        locations can carry the keyword hits from the shared category scan
+        so standalone calls are the only ones that pay for their own sweep.
+        """
+        if text_lower is None:
+            text_lower = text.lower()
         object_location = None
         sub_object = None
         
         # Script format: "ЧЕЛЮСКИН. КАЮТ-КОМПАНИЯ – НОЧЬ"
-        script_pattern = r'([А-ЯЁ][А-ЯЁ\s\-]+)\.\s*([А-ЯЁ][А-ЯЁ\s\-]+(?:\s*[–\-]\s*[А-ЯЁ\s]+)?)'
-        script_match = re.search(script_pattern, text)
+        script_match = self._script_re.search(text)
         if script_match:
             object_location = script_match.group(1).strip()
             sub_object = script_match.group(2).strip()
-            # Remove time of day
-            sub_object = re.sub(r'\s*[–\-]\s*(ДЕНЬ|НОЧЬ|УТРО|ВЕЧЕР)', '', sub_object, flags=re.IGNORECASE)
             return {
                 'object': object_location,
                 'sub_object': sub_object if sub_object else None
             }
-        
+
         # Look for location keywords
-        locs = self.extract_keywords_from_set(text, LOCATION_KEYWORDS)
-        
+        if locations is not None:
+            locs = locations
+        else:
+            locs = self._keywords_from_set(text_lower, LOCATION_KEYWORDS)
+
         # Check for ship names (common in scripts)
-        ship_match = re.search(r'\b(ЧЕЛЮСКИН|КОРАБЛЬ|СУДНО|ПАРОХОД)\b', text, re.IGNORECASE)
+        ship_match = self._ship_re.search(text)
         if ship_match:
             object_location = ship_match.group(1)
         
@@ -134,80 +402,124 @@ class ElementExtractor:
             else:
                 sub_object = loc.capitalize()
                 break
-        
+
+        # Last resort: LOC entity from the (cached) Natasha pass
+        if not object_location and not sub_object:
+            ndoc = self._natasha_doc(text)
+            if ndoc is not None:
+                for span in ndoc.spans:
+                    if span.type == 'LOC':
+                        object_location = span.text
+                        break
+
         return {
             'object': object_location,
             'sub_object': sub_object
         }
     
-    def extract_time_of_day(self, text: str) -> Optional[str]:
+    def extract_time_of_day(self, text: str, text_lower: Optional[str] = None) -> Optional[str]:
         """Extract time of day from scene text."""
-        times = self.extract_keywords_from_set(text, TIME_KEYWORDS)
-        
-        # Priority mapping
-        priority = {'ночь': 'Ночь', 'ночное': 'Ночь', 'ночью': 'Ночь',
-                   'день': 'День', 'дневное': 'День',
-                   'утро': 'Утро', 'утреннее': 'Утро', 'утром': 'Утро',
-                   'вечер': 'Вечер', 'вечернее': 'Вечер', 'вечером': 'Вечер'}
-        
-        for time in times:
-            if time in priority:
-                return priority[time]
-        
-        # Return first found or None
-        return times[0].capitalize() if times else None
+        if text_lower is None:
+            text_lower = text.lower()
+        match = TOD_RE.search(text_lower)
+        if not match:
+            return None
+        if match.lastgroup != 'other':
+            return match.lastgroup
+
+        # A canonical time anywhere in the text outranks words like
+        # рассвет, matching the old priority behavior
+        first_other = match.group(0)
+        for later in TOD_RE.finditer(text_lower, match.end()):
+            if later.lastgroup != 'other':
+                return later.lastgroup
+        return first_other.capitalize()
     
-    def extract_interior_exterior(self, text: str) -> Optional[str]:
-        """Determine if scene is interior or exterior."""
-        text_lower = text.lower()
-        
-        interior_keywords = ['кабинет', 'комната', 'дом', 'квартира', 'офис', 'клуб', 
-                           'кафе', 'ресторан', 'кают-компания', 'радиорубка']
-        exterior_keywords = ['улица', 'площадь', 'парк', 'сквер', 'на улице', 
-                           'на площади', 'берег', 'море', 'лед']
-        
-        for kw in interior_keywords:
-            if kw in text_lower:
-                return 'Инт'
-        
-        for kw in exterior_keywords:
-            if kw in text_lower:
-                return 'Нат'
-        
+    def extract_interior_exterior(self, text: str, text_lower: Optional[str] = None,
+                                  interior_hits: Optional[List[str]] = None,
+                                  exterior_hits: Optional[List[str]] = None) -> Optional[str]:
+        """Determine if scene is interior or exterior.
+
+        The hit lists can carry bucket results from the shared category
+        scan; standalone calls run their own sweep.
+        """
+        if interior_hits is None or exterior_hits is None:
+            if text_lower is None:
+                text_lower = text.lower()
+            buckets = self._scan_categories(text_lower)
+            interior_hits = buckets['interior']
+            exterior_hits = buckets['exterior']
+
+        if interior_hits:
+            return 'Инт'
+        if exterior_hits:
+            return 'Нат'
         return None
     
-    def extract_all(self, text: str) -> Dict[str, Any]:
+    def extract_all_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract elements for many scenes at once.
+
+        Runs spaCy over all texts in a single nlp.pipe() batch instead of
+        one pipeline call per scene, which is much faster for NER.
+        """
+        if self.nlp is not None:
+            spacy_docs = self.nlp.pipe(texts, batch_size=64)
+        else:
+            spacy_docs = (None for _ in texts)
+
+        return [self.extract_all(text, spacy_doc=doc)
+                for text, doc in zip(texts, spacy_docs)]
+
+    def extract_all(self, text: str, spacy_doc=None) -> Dict[str, Any]:
         """Extract all production elements from scene text."""
-        location = self.extract_location(text)
-        characters = self.extract_characters(text)
+        cached = self._result_cache.get(text)
+        if cached is not None:
+            self._result_cache.move_to_end(text)
+            return self._copy_result(cached)
+
+        # Shared per-scene context: the lowered copy and the line split
+        # happen exactly once, and one automaton pass buckets all keyword
+        # categories up front
+        ctx = _ExtractionContext(text, text.lower(), tuple(text.splitlines()))
+        buckets = self._scan_categories(ctx.lower)
+        # Category hits stay structured lists - the table generator joins
+        # them exactly once at render time
+        location = self.extract_location(text, ctx.lower,
+                                         locations=buckets['location'])
+        characters = self.extract_characters(text, spacy_doc=spacy_doc,
+                                             lines=ctx.lines)
         
         # Main vs secondary (first 3 are main)
         main_chars = characters[:3]
         secondary_chars = characters[3:]
         
-        props = self.extract_keywords_from_set(text, PROP_KEYWORDS)
-        vehicles = self.extract_keywords_from_set(text, VEHICLE_KEYWORDS)
-        sfx = self.extract_keywords_from_set(text, SFX_KEYWORDS)
-        stunt_keywords = self.extract_keywords_from_set(text, STUNT_KEYWORDS)
-        animals = self.extract_keywords_from_set(text, ANIMAL_KEYWORDS)
-        equipment = self.extract_keywords_from_set(text, EQUIPMENT_KEYWORDS)
-        has_mass = bool(self.extract_keywords_from_set(text, MASS_KEYWORDS))
-        
-        # Extract massovka info
-        mass_info = ', '.join(self.extract_keywords_from_set(text, MASS_KEYWORDS)) if has_mass else None
-        
-        return {
-            'time_of_day': self.extract_time_of_day(text),
-            'interior_exterior': self.extract_interior_exterior(text),
+        result = {
+            'time_of_day': self.extract_time_of_day(text, ctx.lower),
+            'interior_exterior': self.extract_interior_exterior(
+                text, ctx.lower,
+                interior_hits=buckets['interior'],
+                exterior_hits=buckets['exterior']),
             'location_object': location['object'],
             'location_sub_object': location['sub_object'],
             'characters': main_chars + secondary_chars,  # Combined list
-            'extras': mass_info,  # Just the keywords, no prefix
-            'props': ', '.join(props) if props else None,
-            'vehicles': ', '.join(vehicles) if vehicles else None,
-            'special_effects': ', '.join(sfx) if sfx else None,
-            'stunt': ', '.join(stunt_keywords) if stunt_keywords else None,
-            'animals': ', '.join(animals) if animals else None,
-            'equipment': ', '.join(equipment) if equipment else None,
+            'extras': buckets['mass'],
+            'props': buckets['props'],
+            'vehicles': buckets['vehicles'],
+            'special_effects': buckets['sfx'],
+            'stunt': buckets['stunt'],
+            'animals': buckets['animals'],
+            'equipment': buckets['equipment'],
         }
 
+        self._result_cache[text] = result
+        if len(self._result_cache) > self.RESULT_CACHE_SIZE:
+            self._result_cache.popitem(last=False)
+        return self._copy_result(result)
+
+    @staticmethod
+    def _copy_result(result: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a cached result so callers cannot mutate the cache."""
+        return {key: list(value) if isinstance(value, list) else value
+                for key, value in result.items()}
+
@@ -8,58 +8,91 @@ class SceneSegmenter:
         r"^\s*(СЦЕНА|Сцена|SCENE|INT\.|EXT\.|INT/EXT|INT\/EXT|\d{1,4}[\.\-А-ЯЁ]?)",
         re.IGNORECASE | re.MULTILINE
     )
+
+    # Case-sensitive variant scanned over an uppercased copy: skipping
+    # re.IGNORECASE avoids per-character Unicode case folding, which is
+    # the hot cost on Cyrillic scripts hundreds of KB long.
+    SCENE_HDR_UPPER_RE = re.compile(
+        r"^\s*(СЦЕНА|SCENE|INT\.|EXT\.|INT/EXT|\d{1,4}[\.\-А-ЯЁ]?)",
+        re.MULTILINE
+    )
     
+    # The former five-pattern cascade fused into one alternation; the
+    # alternatives keep the cascade's priority order, so one engine walk
+    # per header line replaces up to five.
+    NUMBER_RE = re.compile(
+        r'(?P<complex>\d+[-А-ЯЁ]?\d*[А-ЯЁ]?\d*(?:[-А-ЯЁ]?\d+)*(?:[-\.]\d+)?)'
+        r'|(?P<n1>\d+)[Nn](?P<n2>\d+)'
+        r'|(?P<s1>\d+)/(?P<s2>\w+)'
+        r'|(?P<simple>\d+[А-Я]?|\d+[-А-ЯЁ]+)'
+        r'|(?P<plain>\d+)'
+    )
+
     def extract_scene_number(self, header_line: str) -> Optional[str]:
         """Extract scene number from header line."""
-        patterns = [
-            r'(\d+[-А-ЯЁ]?\d*[А-ЯЁ]?\d*(?:[-А-ЯЁ]?\d+)*(?:[-\.]\d+)?)', 
-            r'(\d+)[Nn](\d+)',  
-            r'(\d+)[/](\w+)',  
-            r'(\d+[А-Я]?|\d+[-А-ЯЁ]+)',  
-            r'(\d+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, header_line)
-            if match:
-                if len(match.groups()) > 1:
-                    if 'N' in pattern or 'n' in pattern:
-                        return f"{match.group(1)}-N{match.group(2)}"
-                    else:
-                        return f"{match.group(1)}/{match.group(2)}"
-                return match.group(1)
-        
-        return None
+        match = self.NUMBER_RE.search(header_line)
+        if not match:
+            return None
+
+        if match.group('n1') is not None:
+            return f"{match.group('n1')}-N{match.group('n2')}"
+        if match.group('s1') is not None:
+            return f"{match.group('s1')}/{match.group('s2')}"
+        return match.group(match.lastgroup)
     
     def segment(self, text: str) -> List[Dict[str, Any]]:
-        headings = [(m.start(), m.group(0)) for m in self.SCENE_HDR_RE.finditer(text)]
+        # Scan positions on the uppercased copy, slice from the original.
+        # Uppercasing can change string length for exotic characters
+        # (e.g. ß) - fall back to the IGNORECASE pattern in that case so
+        # offsets always line up.
+        text_upper = text.upper()
+        if len(text_upper) == len(text):
+            headings = [(m.start(), m.end())
+                        for m in self.SCENE_HDR_UPPER_RE.finditer(text_upper)]
+        else:
+            headings = [(m.start(), m.end())
+                        for m in self.SCENE_HDR_RE.finditer(text)]
         scenes = []
         
         if not headings:
-            parts = [p.strip() for p in text.split('\n\n') if p.strip()]
-            for i, p in enumerate(parts):
-                scene_num = self.extract_scene_number(p.split('\n')[0]) or str(i + 1)
+            # Walk paragraph boundaries lazily - split('\n\n') would copy
+            # the whole script into a second list of strings first
+            pos = 0
+            index = 0
+            text_len = len(text)
+            while pos < text_len:
+                end = text.find('\n\n', pos)
+                if end < 0:
+                    end = text_len
+                part = text[pos:end].strip()
+                pos = end + 2
+                if not part:
+                    continue
+                index += 1
+                # One find() instead of three split('\n') list builds
+                newline = part.find('\n')
+                first_line = part if newline < 0 else part[:newline]
                 scenes.append({
-                    'scene_number': scene_num,
-                    'header': p.split('\n')[0] if p.split('\n') else '',
-                    'text': p
+                    'scene_number': self.extract_scene_number(first_line) or str(index),
+                    'header': first_line,
+                    'text': part
                 })
             return scenes
         
-        for i, (pos, hdr) in enumerate(headings):
-            start = pos
+        for i, (start, hdr_end) in enumerate(headings):
             end = headings[i + 1][0] if i + 1 < len(headings) else len(text)
-            seg_text = text[start:end].strip()
-            first_line = seg_text.splitlines()[0] if seg_text.splitlines() else hdr
+            # Slice the header line directly instead of materializing every
+            # line of the scene with splitlines()
+            newline = text.find('\n', hdr_end, end)
+            line_end = newline if newline != -1 else end
+            first_line = text[start:line_end].strip()
             scene_num = self.extract_scene_number(first_line) or str(i + 1)
-            if seg_text.startswith(hdr):
-                scene_text = seg_text[len(hdr):].strip()
-            else:
-                scene_text = seg_text
+            # The match is anchored at start, so the header keyword always
+            # ends at hdr_end - no startswith re-scan needed
             scenes.append({
                 'scene_number': scene_num,
-                'header': first_line.strip(),
-                'text': scene_text
+                'header': first_line,
+                'text': text[hdr_end:end].strip()
             })
         
         return scenes
@@ -1,10 +1,51 @@
+import csv
+import openpyxl
 import pandas as pd
 import re
+import zipfile
+from types import MappingProxyType
 from typing import Dict, List, Optional
+from xml.sax.saxutils import escape
+
+try:
+    import xlsxwriter  # C-backed row writer, faster than openpyxl on big sheets
+    HAS_XLSXWRITER = True
+except ImportError:
+    HAS_XLSXWRITER = False
+    xlsxwriter = None
+
+# Synopsis cleanup patterns, compiled once at import - these run for
+# every scene of every table. Nothing in this module passes string
+# patterns to re at call time.
+_SYNOPSIS_PREFIX_NUM = re.compile(r'^[0-9\-А-ЯЁa-zA-Z]+[\.\)]\s*')
+_SYNOPSIS_PREFIX_LOC = re.compile(r'^[А-ЯЁ\s\-\.]+[–\-]\s*[А-ЯЁ]+\.?\s*')
+_MULTI_WS = re.compile(r'\s+')
+
+
+def _safe_str(value) -> str:
+    """Render a scalar cell value, treating None/empty as ''."""
+    if value is None:
+        return ''
+    return str(value).strip() if value else ''
+
+
+def _join_elements(value) -> str:
+    """Join an element list at render time; pass legacy strings through.
+
+    One generator pass feeds the join directly - no intermediate parts
+    list. The exact type check mirrors the characters handler: payloads
+    only ever carry plain lists.
+    """
+    if type(value) is list:
+        return ', '.join(str(item) for item in value if item)
+    if not value:
+        return ''
+    return str(value).strip()
+
 
 class TableGenerator:
     """Generate pre-production tables from processed scenes."""
-    
+
     # Column presets - matching updated template structure
     PRESETS = {
         'basic': [
@@ -55,124 +96,407 @@ class TableGenerator:
             'Животные'
         ]
     }
-    
+
+    # Preset column lists resolved to tuples once - generate() never
+    # copies or mutates them
+    _RESOLVED_PRESETS = {name: tuple(columns) for name, columns in PRESETS.items()}
+
     def __init__(self):
-        pass
-    
-    def map_element_to_column(self, column: str, scene_data: Dict) -> str:
-        """Map extracted elements to table columns."""
-        
-        # Safely handle None values
-        def safe_str(value):
-            if value is None:
-                return ''
-            return str(value).strip() if value else ''
-        
-        # Basic fields
-        series_num = safe_str(scene_data.get('series_number'))
-        scene_num = safe_str(scene_data.get('scene_number'))
-        time_of_day = safe_str(scene_data.get('time_of_day'))
-        int_nat = safe_str(scene_data.get('interior_exterior'))
-        
-        # Location columns (now separate)
-        obj_val = scene_data.get('location_object')
-        obj = safe_str(obj_val)
-        sub_obj_val = scene_data.get('location_sub_object')
-        sub_obj = safe_str(sub_obj_val)
-        
-        # Synopsis (now separate column)
-        text_val = scene_data.get('text')
-        synopsis_text = safe_str(text_val)
+        # Rendered-column cache: generating 'basic' then 'extended' for
+        # the same scenes batch reuses the shared columns outright. The
+        # strong reference to the batch keeps ids stable, so the cache
+        # can never alias a recycled object.
+        self._column_cache: Dict[str, list] = {}
+        self._column_cache_scenes: Optional[List[Dict]] = None
+
+    @staticmethod
+    def _col_series(scene_data: Dict) -> str:
+        return _safe_str(scene_data.get('series_number'))
+
+    @staticmethod
+    def _col_scene(scene_data: Dict) -> str:
+        return _safe_str(scene_data.get('scene_number'))
+
+    @staticmethod
+    def _col_time_of_day(scene_data: Dict) -> str:
+        return _safe_str(scene_data.get('time_of_day'))
+
+    @staticmethod
+    def _col_int_nat(scene_data: Dict) -> str:
+        return _safe_str(scene_data.get('interior_exterior'))
+
+    @staticmethod
+    def _col_object(scene_data: Dict) -> str:
+        return _safe_str(scene_data.get('location_object'))
+
+    @staticmethod
+    def _col_sub_object(scene_data: Dict) -> str:
+        return _safe_str(scene_data.get('location_sub_object'))
+
+    @staticmethod
+    def _col_synopsis(scene_data: Dict) -> str:
+        synopsis_text = _safe_str(scene_data.get('text'))
         if synopsis_text:
-            # Clean up synopsis - remove scene headers and formatting
-            synopsis_text = re.sub(r'^[0-9\-А-ЯЁa-zA-Z]+[\.\)]\s*', '', synopsis_text)
-            synopsis_text = re.sub(r'^[А-ЯЁ\s\-\.]+[–\-]\s*[А-ЯЁ]+\.?\s*', '', synopsis_text)
-            synopsis_text = synopsis_text[:300].strip()
-            synopsis_text = re.sub(r'\s+', ' ', synopsis_text)
-        
-        # Characters
-        characters = scene_data.get('characters', '')
-        if characters is None:
-            characters = ''
-        elif isinstance(characters, list):
-            characters = ', '.join([str(c) for c in characters if c])
-        else:
-            characters = str(characters) if characters else ''
-        
-        # Extras/Massovka (extract from extras field, remove prefix if present)
-        extras = scene_data.get('extras') or ''
+            # Clean up synopsis - remove scene headers and formatting.
+            # Only the first 300 chars survive anyway, so the anchored
+            # prefix patterns run on a 500-char window (the slack covers
+            # whatever the prefixes strip) instead of the whole scene.
+            # Length guards skip the slice copy for short scenes, which
+            # most header-only scenes are.
+            if len(synopsis_text) > 500:
+                synopsis_text = synopsis_text[:500]
+            synopsis_text = _SYNOPSIS_PREFIX_NUM.sub('', synopsis_text)
+            synopsis_text = _SYNOPSIS_PREFIX_LOC.sub('', synopsis_text)
+            if len(synopsis_text) > 300:
+                synopsis_text = synopsis_text[:300]
+            # split()/join collapses and strips whitespace in one pure-C
+            # pass - no regex engine involved
+            synopsis_text = ' '.join(synopsis_text.split())
+        return synopsis_text
+
+    @staticmethod
+    def _col_characters(scene_data: Dict) -> str:
+        characters = scene_data.get('characters')
+        # Exact type check: JSON payloads only ever carry plain lists
+        # here, and `type is` skips isinstance's subclass machinery
+        if type(characters) is list:
+            return ', '.join(str(c) for c in characters if c)
+        if not characters:
+            return ''
+        return str(characters)
+
+    @staticmethod
+    def _col_extras(scene_data: Dict) -> str:
+        # Remove legacy prefix if a client sent one. This is the only
+        # conditional cell assembly left and it fires for rare legacy
+        # payloads only - not worth a vectorized np.where pass.
+        extras = _join_elements(scene_data.get('extras'))
         if extras.startswith('Массовка:'):
             extras = extras.replace('Массовка:', '').strip()
         elif extras.startswith('Массовка'):
             extras = extras.replace('Массовка', '').strip()
-        
-        # Props, vehicles (now separate columns)
-        props = safe_str(scene_data.get('props'))
-        vehicles = safe_str(scene_data.get('vehicles'))
-        
-        # Animals - use extracted animals field
-        animals = safe_str(scene_data.get('animals'))
-        
-        # Stunt/Trick - use extracted stunt field
-        stunt = safe_str(scene_data.get('stunt'))
-        
-        # Makeup and Costume (will need special extraction later)
-        makeup = ''
-        costume = ''
-        
-        # Time of year (new column - will need special extraction)
-        time_of_year = ''
-        
-        column_mapping = {
-            'Серия': series_num,
-            'Сцена': scene_num,
-            'Режим': time_of_day,
-            'Инт / нат': int_nat,
-            'Объект': obj,
-            'Подобъект': sub_obj,
-            'Синопсис': synopsis_text,
-            'Время года': time_of_year,
-            'Персонажи': characters,
-            'Массовка': extras,
-            'Грим': makeup,
-            'Костюм': costume,
-            'Реквизит': props,
-            'Игровой транспорт': vehicles,
-            'Трюк': stunt,
-            'Животные': animals,
-        }
-        
-        return column_mapping.get(column, '')
-    
+        return extras
+
+    @staticmethod
+    def _col_props(scene_data: Dict) -> str:
+        return _join_elements(scene_data.get('props'))
+
+    @staticmethod
+    def _col_vehicles(scene_data: Dict) -> str:
+        return _join_elements(scene_data.get('vehicles'))
+
+    @staticmethod
+    def _col_stunt(scene_data: Dict) -> str:
+        return _join_elements(scene_data.get('stunt'))
+
+    @staticmethod
+    def _col_animals(scene_data: Dict) -> str:
+        return _join_elements(scene_data.get('animals'))
+
+    @staticmethod
+    def _col_blank(scene_data: Dict) -> str:
+        return ''
+
+    def map_element_to_column(self, column: str, scene_data: Dict) -> str:
+        """Map extracted elements to table columns.
+
+        One hash lookup in the class-level dispatch table - no chained
+        column-name comparisons.
+        """
+        extractor = self._EXTRACTORS.get(column)
+        return extractor(scene_data) if extractor else ''
+
+    def _resolve_columns(self, preset: str,
+                         custom_columns: Optional[List[str]]) -> tuple:
+        """Resolve the column tuple for a preset or custom selection.
+
+        Custom columns become a tuple with Серия prepended when missing -
+        no copy()/insert() shift.
+        """
+        if preset == 'custom' and custom_columns:
+            if 'Серия' in custom_columns:
+                return tuple(custom_columns)
+            return ('Серия', *custom_columns)
+        return self._RESOLVED_PRESETS.get(preset, self._RESOLVED_PRESETS['basic'])
+
     def generate(self, scenes_data: List[Dict], preset: str = 'basic', custom_columns: Optional[List[str]] = None) -> pd.DataFrame:
         """Generate pre-production table."""
-        # Get columns based on preset
-        if preset == 'custom' and custom_columns:
-            columns = custom_columns.copy()
-            # Always ensure Серия column is included first
-            if 'Серия' not in columns:
-                columns.insert(0, 'Серия')
-        elif preset in self.PRESETS:
-            columns = self.PRESETS[preset]
-        else:
-            columns = self.PRESETS['basic']
-        
-        # Create rows for each scene
-        rows = []
+        columns = self._resolve_columns(preset, custom_columns)
+
+        # Build one list per column (structure-of-arrays) and hand pandas
+        # the columnar dict: no per-row dict allocations, and the
+        # constructor allocates each column in one step instead of
+        # consolidating records
+        # Reuse rendered columns when the caller generates several
+        # presets from the same scenes batch
+        if self._column_cache_scenes is not scenes_data:
+            self._column_cache = {}
+            self._column_cache_scenes = scenes_data
+
+        # Columns whose extractor is the blank stub (or unknown) are
+        # constant - fill them with one allocation instead of calling a
+        # function per row
+        column_data = {}
+        active_columns = []
+        row_count = len(scenes_data)
+        for column in columns:
+            cached_column = self._column_cache.get(column)
+            if cached_column is not None:
+                column_data[column] = cached_column
+                continue
+            extractor = self._EXTRACTORS.get(column)
+            if extractor is None or extractor is self._col_blank:
+                column_data[column] = [''] * row_count
+            else:
+                column_data[column] = []
+                active_columns.append(column)
+
+        # One list comprehension per column with the handler hoisted to a
+        # local: the per-cell cost is a single call, and the list is
+        # built by the comprehension's C loop. Each extractor reads
+        # exactly the one scene_data field its column needs.
+        vectorize_synopsis = 'Синопсис' in active_columns
+        for column in active_columns:
+            if vectorize_synopsis and column == 'Синопсис':
+                # Raw window only - the regex cleanup runs once over the
+                # whole column below, in pandas' C loop. The length guard
+                # skips the slice copy for short scenes.
+                column_data[column] = [
+                    text[:500] if len(text) > 500 else text
+                    for text in (_safe_str(scene_data.get('text'))
+                                 for scene_data in scenes_data)
+                ]
+            else:
+                extract_cell = self._EXTRACTORS[column]
+                column_data[column] = [extract_cell(scene_data)
+                                       for scene_data in scenes_data]
+
+        # All regex cleanup lives in this column-wide pass (pandas
+        # dispatches the compiled patterns through its Cython string
+        # loop); the per-cell extractors left in the loop only join
+        # per-scene element lists, which has no batched equivalent.
+        if vectorize_synopsis:
+            synopsis = pd.Series(column_data['Синопсис'], dtype=object)
+            column_data['Синопсис'] = (
+                synopsis
+                .str.replace(_SYNOPSIS_PREFIX_NUM, '', regex=True)
+                .str.replace(_SYNOPSIS_PREFIX_LOC, '', regex=True)
+                .str.slice(0, 300)
+                .str.strip()
+                .str.replace(_MULTI_WS, ' ', regex=True)
+            )
+
+        for column in columns:
+            self._column_cache[column] = column_data[column]
+
+        # Label columns repeat a handful of values over thousands of
+        # rows - категориальный dtype stores one small int per row plus
+        # a dictionary, shrinking memory and speeding export/search.
+        # Built before the constructor so the frame comes out with its
+        # final blocks - assigning converted columns afterwards would
+        # re-split the block manager.
+        for column in ('Серия', 'Режим', 'Инт / нат', 'Время года'):
+            if column in column_data:
+                column_data[column] = pd.Categorical(column_data[column])
+
+        return pd.DataFrame(column_data, columns=columns, copy=False)
+
+    # Static Open XML parts for the raw writer; only the sheet data and
+    # shared strings vary between exports
+    _XLSX_CONTENT_TYPES = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+        '</Types>'
+    )
+    _XLSX_ROOT_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    _XLSX_WORKBOOK = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Препродакшн-таблица" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+    _XLSX_WORKBOOK_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+        '</Relationships>'
+    )
+
+    def export_xlsx_raw(self, df: pd.DataFrame, file_path: str):
+        """Write the Open XML parts of a value-only workbook directly.
+
+        Bypasses the Excel libraries entirely: sheet rows stream straight
+        into the zip entry as shared-string references, and the
+        shared-strings table dedupes the handful of labels these tables
+        repeat thousands of times. No cell objects or styles are built.
+        """
+        shared_strings: Dict[str, int] = {}
+
+        def string_id(value) -> int:
+            text = '' if value is None else str(value)
+            index = shared_strings.get(text)
+            if index is None:
+                index = len(shared_strings)
+                shared_strings[text] = index
+            return index
+
+        with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as archive:
+            with archive.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    b'<sheetData>'
+                )
+                header_cells = ''.join(
+                    f'<c t="s"><v>{string_id(column)}</v></c>' for column in df.columns)
+                sheet.write(f'<row>{header_cells}</row>'.encode())
+                for row in df.itertuples(index=False, name=None):
+                    cells = ''.join(f'<c t="s"><v>{string_id(value)}</v></c>'
+                                    for value in row)
+                    sheet.write(f'<row>{cells}</row>'.encode())
+                sheet.write(b'</sheetData></worksheet>')
+
+            with archive.open('xl/sharedStrings.xml', 'w') as strings:
+                strings.write(
+                    f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                    f'count="{len(shared_strings)}" uniqueCount="{len(shared_strings)}">'.encode()
+                )
+                for text in shared_strings:  # insertion order == index order
+                    strings.write(
+                        f'<si><t xml:space="preserve">{escape(text)}</t></si>'.encode())
+                strings.write(b'</sst>')
+
+            archive.writestr('[Content_Types].xml', self._XLSX_CONTENT_TYPES)
+            archive.writestr('_rels/.rels', self._XLSX_ROOT_RELS)
+            archive.writestr('xl/workbook.xml', self._XLSX_WORKBOOK)
+            archive.writestr('xl/_rels/workbook.xml.rels', self._XLSX_WORKBOOK_RELS)
+
+    def generate_and_export_xlsx(self, scenes_data: List[Dict], file_path: str,
+                                 preset: str = 'basic',
+                                 custom_columns: Optional[List[str]] = None):
+        """Walk the scenes once and stream rows straight into a workbook.
+
+        Fuses generate() and export_xlsx for callers that only want the
+        file: no DataFrame or column lists are materialized, so memory
+        stays at one row regardless of script size.
+        """
+        columns = self._resolve_columns(preset, custom_columns)
+        extractors = [self._EXTRACTORS.get(column, self._col_blank)
+                      for column in columns]
+
+        if HAS_XLSXWRITER:
+            workbook = xlsxwriter.Workbook(file_path, {'constant_memory': True})
+            worksheet = workbook.add_worksheet('Препродакшн-таблица')
+            worksheet.write_row(0, 0, list(columns))
+            for row_index, scene_data in enumerate(scenes_data, 1):
+                worksheet.write_row(row_index, 0,
+                                    [extract(scene_data) for extract in extractors])
+            workbook.close()
+            return
+
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Препродакшн-таблица')
+        worksheet.append(list(columns))
         for scene_data in scenes_data:
-            row = {}
-            for column in columns:
-                row[column] = self.map_element_to_column(column, scene_data)
-            rows.append(row)
-        
-        # Create DataFrame
-        df = pd.DataFrame(rows, columns=columns)
-        return df
-    
+            worksheet.append([extract(scene_data) for extract in extractors])
+        workbook.save(file_path)
+
+    def export(self, df: pd.DataFrame, file_path: str):
+        """Export by file extension.
+
+        CSV is the fast path - spreadsheet writers cost orders of
+        magnitude more for the same data, so callers that do not
+        explicitly need a workbook should pass a .csv path.
+        """
+        extension = file_path.lower().rsplit('.', 1)[-1]
+        if extension in ('csv', 'tsv'):
+            return self.export_csv(df, file_path)
+        return self.export_xlsx(df, file_path)
+
     def export_csv(self, df: pd.DataFrame, file_path: str, encoding: str = 'utf-8-sig'):
-        """Export table to CSV."""
-        df.to_csv(file_path, index=False, encoding=encoding)
-    
-    def export_xlsx(self, df: pd.DataFrame, file_path: str):
-        """Export table to XLSX."""
-        df.to_excel(file_path, index=False, engine='openpyxl')
+        """Export table to CSV.
+
+        These tables are all strings, so the stdlib csv writer can
+        stream plain tuples and skip pandas' per-cell formatter; frames
+        with numeric dtypes fall back to to_csv for its formatting.
+        """
+        all_text = all(
+            dtype == object or isinstance(dtype, pd.CategoricalDtype)
+            for dtype in df.dtypes
+        )
+        if all_text:
+            with open(file_path, 'w', encoding=encoding, newline='') as out:
+                writer = csv.writer(out, lineterminator='\n')
+                writer.writerow(df.columns)
+                writer.writerows(df.itertuples(index=False, name=None))
+            return
+
+        df.to_csv(file_path, index=False, encoding=encoding,
+                  lineterminator='\n', chunksize=65536)
+
+    def export_xlsx(self, df: pd.DataFrame, file_path: str, engine: str = 'auto'):
+        """Export table to XLSX.
+
+        Both engines stream rows instead of building a full cell tree:
+        xlsxwriter with constant_memory flushes each row as written and
+        is the fastest for these value-only workbooks; openpyxl's
+        write-only mode is the fallback when xlsxwriter is missing.
+
+        Args:
+            engine: 'xlsxwriter', 'openpyxl', or 'auto' (prefer
+                xlsxwriter when installed)
+        """
+        if engine == 'auto':
+            engine = 'xlsxwriter' if HAS_XLSXWRITER else 'openpyxl'
+
+        if engine == 'xlsxwriter':
+            workbook = xlsxwriter.Workbook(file_path, {'constant_memory': True})
+            worksheet = workbook.add_worksheet('Препродакшн-таблица')
+            worksheet.write_row(0, 0, list(df.columns))
+            for row_index, row in enumerate(df.itertuples(index=False, name=None), 1):
+                worksheet.write_row(row_index, 0, row)
+            workbook.close()
+            return
+
+        workbook = openpyxl.Workbook(write_only=True)
+        worksheet = workbook.create_sheet('Препродакшн-таблица')
+        worksheet.append(list(df.columns))
+        for row in df.itertuples(index=False, name=None):
+            worksheet.append(row)
+        workbook.save(file_path)
+
+
+# Column -> extractor dispatch shared by every TableGenerator. Built
+# after the class body so the entries are plain functions, and frozen so
+# nothing rebuilds or mutates it per instance.
+TableGenerator._EXTRACTORS = MappingProxyType({
+    'Серия': TableGenerator._col_series,
+    'Сцена': TableGenerator._col_scene,
+    'Режим': TableGenerator._col_time_of_day,
+    'Инт / нат': TableGenerator._col_int_nat,
+    'Объект': TableGenerator._col_object,
+    'Подобъект': TableGenerator._col_sub_object,
+    'Синопсис': TableGenerator._col_synopsis,
+    'Время года': TableGenerator._col_blank,  # needs special extraction later
+    'Персонажи': TableGenerator._col_characters,
+    'Массовка': TableGenerator._col_extras,
+    'Грим': TableGenerator._col_blank,  # needs special extraction later
+    'Костюм': TableGenerator._col_blank,  # needs special extraction later
+    'Реквизит': TableGenerator._col_props,
+    'Игровой транспорт': TableGenerator._col_vehicles,
+    'Трюк': TableGenerator._col_stunt,
+    'Животные': TableGenerator._col_animals,
+})
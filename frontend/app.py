@@ -4,9 +4,12 @@ Streamlit frontend for Scenario Pre-Production Generator.
 import streamlit as st
 import pandas as pd
 import requests
+import csv
+import functools
 import json
 import os
-from io import BytesIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from io import BytesIO, StringIO
 import time
 import re
 
@@ -20,6 +23,37 @@ st.set_page_config(
 # API endpoint
 API_URL = os.getenv("API_URL", "http://localhost:8000")
 
+# xlsxwriter streams rows without openpyxl's in-memory cell tree -
+# noticeably faster on multi-thousand-scene exports
+try:
+    import xlsxwriter  # noqa: F401
+    EXCEL_ENGINE = 'xlsxwriter'
+except ImportError:
+    EXCEL_ENGINE = 'openpyxl'
+
+# orjson encodes/decodes the large scene payloads ~5-10x faster than
+# the stdlib encoder; fall back transparently when it is missing
+try:
+    import orjson
+
+    def _json_loads(data):
+        return orjson.loads(data)
+
+    def _json_dumps_sorted(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+
+    def _json_dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj)
+except ImportError:
+    def _json_loads(data):
+        return json.loads(data)
+
+    def _json_dumps_sorted(obj) -> bytes:
+        return json.dumps(obj, sort_keys=True, ensure_ascii=False).encode()
+
+    def _json_dumps_bytes(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False).encode()
+
 # Initialize session state
 if 'processed_scenes' not in st.session_state:
     st.session_state.processed_scenes = None
@@ -39,6 +73,12 @@ PRESETS = {
     'full': 'Полный'
 }
 
+# Streamlit reruns this script on every widget interaction - hoist the
+# key list and index lookup so reruns do O(1) work instead of
+# rebuilding the list and scanning it with .index()
+_PRESET_KEYS = list(PRESETS.keys())
+_PRESET_INDEX_BY_KEY = {key: index for index, key in enumerate(_PRESET_KEYS)}
+
 # All available columns - matching updated template structure
 ALL_COLUMNS = [
     'Серия',
@@ -60,47 +100,120 @@ ALL_COLUMNS = [
 ]
 
 
+# Series-number patterns, compiled once at import - the extractor runs
+# for every file on every rerun
+_SERIES_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'_(\d+)[cCсС]',  # _1c, _2C, _1с, _2С
+    r'[_-](\d+)[._-]',  # _1., -1-, _1_
+    r'серия[_\s]*(\d+)',  # серия_1, серия 1
+    r'[Сс]ерия[_\s]*(\d+)',  # Серия_1, серия 1
+)]
+_ANY_DIGITS = re.compile(r'\d+')
+
+# Cyrillic letters standing in for series digits, in priority order.
+# Kept as an ordered scan (not str.translate + digit search): translate
+# would make position win, and e.g. ЧЕЛЮСКИН_ЗС must resolve to З=3,
+# not the leading Ч=4.
+_CYRILLIC_SERIES = (
+    ('з', '3'), ('З', '3'),
+    ('ч', '4'), ('Ч', '4'),
+    ('п', '5'), ('П', '5'),
+    ('ш', '6'), ('Ш', '6'),
+)
+
+
+@functools.lru_cache(maxsize=256)
 def extract_series_number(filename: str) -> str:
     """
-    Extract series number from filename.
+    Extract series number from filename. Pure over the filename, so the
+    result is memoized across Streamlit reruns.
     Examples:
     - ЧЕЛЮСКИН_1c_15.08_ФИНАЛ -> "1"
     - ЧЕЛЮСКИН_2C_15.08_ФИНАЛ -> "2"
     - ЧЕЛЮСКИН_ЗС_05.09_ФИНАЛ -> "3" (Cyrillic З = 3)
     """
-    # Try to find number after underscore (pattern: _Xc or _XC)
-    patterns = [
-        r'_(\d+)[cCсС]',  # _1c, _2C, _1с, _2С
-        r'[_-](\d+)[._-]',  # _1., -1-, _1_
-        r'серия[_\s]*(\d+)',  # серия_1, серия 1
-        r'[Сс]ерия[_\s]*(\d+)',  # Серия_1, серия 1
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, filename, re.IGNORECASE)
+    for pattern in _SERIES_PATTERNS:
+        match = pattern.search(filename)
         if match:
             return match.group(1)
     
     # Try Cyrillic number mapping (З = 3, Ч = 4, П = 5, Ш = 6, etc.)
-    cyrillic_to_num = {
-        'з': '3', 'З': '3',
-        'ч': '4', 'Ч': '4',
-        'п': '5', 'П': '5',
-        'ш': '6', 'Ш': '6',
-    }
-    
-    for cyr, num in cyrillic_to_num.items():
+    for cyr, num in _CYRILLIC_SERIES:
         if cyr in filename:
             return num
     
     # Default: try to extract first number from filename
-    numbers = re.findall(r'\d+', filename)
-    if numbers:
-        return numbers[0]
+    match = _ANY_DIGITS.search(filename)
+    if match:
+        return match.group(0)
     
     # If nothing found, return "1" as default
     return "1"
 
+# Label columns repeat a handful of values; category dtype stores one
+# small code per row and speeds the stats/search over big tables. The
+# data editor renders them as option cells, which suits these
+# closed-vocabulary columns.
+_CATEGORY_COLUMNS = ('Серия', 'Режим', 'Инт / нат', 'Время года')
+
+# Arrow-backed strings serialize straight into the Arrow table the data
+# editor ships to the browser, skipping per-cell object conversion
+try:
+    import pyarrow  # noqa: F401
+    _TEXT_DTYPE = 'string[pyarrow]'
+except ImportError:
+    _TEXT_DTYPE = None
+
+
+def compact_label_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """Convert label columns to category and text columns to
+    Arrow-backed strings."""
+    for column in df.columns:
+        if column in _CATEGORY_COLUMNS:
+            as_category = df[column].astype('category')
+            # Cells cleared in the data editor come back as NA; keep ''
+            # among the categories so fillna('') stays legal downstream
+            if '' not in as_category.cat.categories:
+                as_category = as_category.cat.add_categories([''])
+            df[column] = as_category
+        elif _TEXT_DTYPE and df[column].dtype == object:
+            df[column] = df[column].astype(_TEXT_DTYPE)
+    return df
+
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def request_table(scenes_json: bytes, preset: str, columns) -> list:
+    """POST /generate-table, memoized on the exact payload.
+
+    Reruns with identical scenes/preset/columns (every widget
+    interaction after a generation) skip the JSON round trip and the
+    backend work entirely. Errors are not cached.
+    """
+    body = _json_dumps_bytes({
+        "scenes_data": _json_loads(scenes_json),
+        "preset": preset,
+        "custom_columns": list(columns) if columns else None,
+    })
+    response = requests.post(
+        f"{API_URL}/generate-table",
+        data=body,
+        headers={'Content-Type': 'application/json'},
+    )
+    if response.status_code != 200:
+        raise RuntimeError(response.text)
+    return _json_loads(response.content)['table']
+
+
+def build_search_haystack(df: pd.DataFrame) -> pd.Series:
+    """Row-wise concatenation of all columns, lowercased, for search.
+
+    Stored in session state next to the table (not st.cache_data, which
+    would re-hash the whole frame on every keystroke just to find the
+    cache entry) and refreshed whenever the table changes.
+    """
+    return df.fillna('').astype(str).agg('\x1f'.join, axis=1).str.lower()
+
+
 st.title("🎬 Генератор препродакшн-таблиц для киносценариев")
 st.markdown("---")
 
@@ -114,9 +227,9 @@ with st.sidebar:
     if not use_custom:
         preset_choice = st.selectbox(
             "Выберите пресет таблицы",
-            options=list(PRESETS.keys()),
+            options=_PRESET_KEYS,
             format_func=lambda x: PRESETS[x],
-            index=list(PRESETS.keys()).index(st.session_state.selected_preset) if st.session_state.selected_preset in PRESETS else 0
+            index=_PRESET_INDEX_BY_KEY.get(st.session_state.selected_preset, 0)
         )
         st.session_state.selected_preset = preset_choice
         st.session_state.selected_columns = None
@@ -161,12 +274,12 @@ with tab1:
         st.subheader("📋 Загруженные файлы:")
         file_info = []
         for idx, file in enumerate(uploaded_files, 1):
-            file_size = len(file.read())
-            file.seek(0)  # Reset file pointer
+            # UploadedFile exposes its size directly - no need to read
+            # the whole body just to count bytes
             file_info.append({
                 'index': idx,
                 'name': file.name,
-                'size': file_size / 1024
+                'size': file.size / 1024
             })
         
         # Display files in a nice format
@@ -188,58 +301,73 @@ with tab1:
                 
                 try:
                     all_processed_scenes = []
-                    
-                    # Process each file
-                    for idx, uploaded_file in enumerate(uploaded_files):
-                        status_text.text(f"Обработка файла {idx + 1} из {len(uploaded_files)}: {uploaded_file.name}...")
-                        progress_bar.progress(idx / len(uploaded_files))
-                        
-                        # Upload file to backend
-                        files = {'file': (uploaded_file.name, uploaded_file, uploaded_file.type)}
-                        response = requests.post(f"{API_URL}/upload", files=files, timeout=300)
-                        
-                        if response.status_code == 200:
-                            data = response.json()
-                            scenes = data['scenes']
-                            
-                            # Extract series number from filename
-                            series_num = extract_series_number(uploaded_file.name)
-                            
-                            # Add series number to each scene
-                            for scene in scenes:
-                                scene['series_number'] = series_num
-                                all_processed_scenes.append(scene)
-                            
-                            status_text.text(f"✅ Файл {idx + 1} обработан: {len(scenes)} сцен")
-                        else:
-                            st.warning(f"⚠️ Ошибка при обработке {uploaded_file.name}: {response.text}")
-                    
-                    progress_bar.progress(100)
+
+                    def upload_file_to_backend(uploaded_file):
+                        """POST one file and parse its NDJSON scene stream."""
+                        files = {'file': (uploaded_file.name, uploaded_file,
+                                          uploaded_file.type)}
+                        response = requests.post(f"{API_URL}/upload", files=files,
+                                                 timeout=300, stream=True)
+                        if response.status_code != 200:
+                            return None, response.text
+                        # Raw UTF-8 bytes decode directly - no reliance
+                        # on requests' encoding guess
+                        return [_json_loads(line)
+                                for line in response.iter_lines() if line], None
+
+                    # Upload files in parallel - wall-clock approaches the
+                    # slowest file instead of the sum. Results are stored
+                    # by index so the combined table keeps file order, and
+                    # all st.* calls stay on the main thread.
+                    results = [None] * len(uploaded_files)
+                    completed = 0
+                    with ThreadPoolExecutor(
+                            max_workers=min(8, len(uploaded_files))) as executor:
+                        future_to_index = {
+                            executor.submit(upload_file_to_backend, uploaded_file): idx
+                            for idx, uploaded_file in enumerate(uploaded_files)
+                        }
+                        for future in as_completed(future_to_index):
+                            idx = future_to_index[future]
+                            scenes, error_text = future.result()
+                            completed += 1
+                            progress_bar.progress(completed / len(uploaded_files))
+                            if scenes is None:
+                                st.warning(f"⚠️ Ошибка при обработке {uploaded_files[idx].name}: {error_text}")
+                            else:
+                                results[idx] = scenes
+                                status_text.text(f"✅ Файл {idx + 1} обработан: {len(scenes)} сцен")
+
+                    # Merge in original file order with series numbers
+                    for idx, scenes in enumerate(results):
+                        if not scenes:
+                            continue
+                        series_num = extract_series_number(uploaded_files[idx].name)
+                        for scene in scenes:
+                            scene['series_number'] = series_num
+                            all_processed_scenes.append(scene)
+
                     status_text.text("✅ Все файлы обработаны!")
                     
                     if all_processed_scenes:
                         st.session_state.processed_scenes = all_processed_scenes
                         st.success(f"✅ Успешно обработано {len(all_processed_scenes)} сцен из {len(uploaded_files)} файлов!")
                         
-                        # Generate table
+                        # Generate table (memoized on the payload)
                         status_text.text("Генерация объединенной таблицы...")
                         table_preset = 'custom' if use_custom else st.session_state.selected_preset
-                        table_response = requests.post(
-                            f"{API_URL}/generate-table",
-                            json={
-                                "scenes_data": all_processed_scenes,
-                                "preset": table_preset,
-                                "custom_columns": selected_columns if use_custom else None
-                            }
-                        )
-                        
-                        if table_response.status_code == 200:
-                            table_data = table_response.json()['table']
-                            df = pd.DataFrame(table_data)
+                        try:
+                            table_data = request_table(
+                                _json_dumps_sorted(all_processed_scenes),
+                                table_preset,
+                                tuple(selected_columns) if use_custom and selected_columns else None
+                            )
+                            df = compact_label_columns(pd.DataFrame(table_data))
                             st.session_state.table_data = df
+                            st.session_state.table_haystack = build_search_haystack(df)
                             st.rerun()
-                        else:
-                            st.error(f"Ошибка генерации таблицы: {table_response.text}")
+                        except RuntimeError as table_error:
+                            st.error(f"Ошибка генерации таблицы: {table_error}")
                     else:
                         st.error("Не удалось обработать ни один файл.")
                     
@@ -258,7 +386,10 @@ with tab2:
     if st.session_state.table_data is not None:
         st.header("Препродакшн-таблица")
         
-        df = st.session_state.table_data.copy()
+        # No copy: everything below only reads df or rebinds it to a
+        # filtered view, so copying all object columns per rerun (every
+        # keystroke) bought nothing
+        df = st.session_state.table_data
         
         # Search and filter
         col1, col2 = st.columns([3, 1])
@@ -270,25 +401,29 @@ with tab2:
                 if st.session_state.processed_scenes:
                     try:
                         table_preset = 'custom' if use_custom else st.session_state.selected_preset
-                        table_response = requests.post(
-                            f"{API_URL}/generate-table",
-                            json={
-                                "scenes_data": st.session_state.processed_scenes,
-                                "preset": table_preset,
-                                "custom_columns": selected_columns if use_custom else None
-                            }
+                        table_data = request_table(
+                            _json_dumps_sorted(st.session_state.processed_scenes),
+                            table_preset,
+                            tuple(selected_columns) if use_custom and selected_columns else None
                         )
-                        if table_response.status_code == 200:
-                            table_data = table_response.json()['table']
-                            df = pd.DataFrame(table_data)
-                            st.session_state.table_data = df
-                            st.rerun()
+                        df = compact_label_columns(pd.DataFrame(table_data))
+                        st.session_state.table_data = df
+                        st.session_state.table_haystack = build_search_haystack(df)
+                        st.rerun()
                     except Exception as e:
                         st.error(f"Ошибка: {str(e)}")
         
-        # Filter dataframe if search term provided
+        # Filter dataframe if search term provided. The haystack is
+        # cached per table; regex=False makes the match a literal
+        # substring scan.
         if search_term:
-            mask = df.astype(str).apply(lambda x: x.str.contains(search_term, case=False, na=False)).any(axis=1)
+            haystack = st.session_state.get('table_haystack')
+            if haystack is None or len(haystack) != len(df):
+                # Table arrived without a precomputed haystack (e.g.
+                # restored session) - build and keep it
+                haystack = build_search_haystack(df)
+                st.session_state.table_haystack = haystack
+            mask = haystack.str.contains(search_term.lower(), regex=False, na=False)
             df = df[mask]
             st.info(f"Найдено строк: {len(df)}")
         
@@ -301,9 +436,17 @@ with tab2:
             height=600
         )
         
-        # Update session state if edited
-        if not edited_df.equals(st.session_state.table_data):
-            st.session_state.table_data = edited_df
+        # Update session state if edited. Two guards:
+        # - only when the editor showed the full table; writing back a
+        #   search-filtered view would silently drop the hidden rows
+        # - compare a vectorized 64-bit row-hash sum instead of the
+        #   element-wise equals() walk over the whole frame
+        if not search_term:
+            new_hash = int(pd.util.hash_pandas_object(edited_df, index=False).sum())
+            if new_hash != st.session_state.get('_table_hash'):
+                st.session_state.table_data = edited_df
+                st.session_state._table_hash = new_hash
+                st.session_state.table_haystack = build_search_haystack(edited_df)
         
         # Export buttons
         st.markdown("---")
@@ -312,10 +455,18 @@ with tab2:
         col1, col2 = st.columns(2)
         
         with col1:
-            # CSV export
-            csv_buffer = BytesIO()
-            edited_df.to_csv(csv_buffer, index=False, encoding='utf-8-sig')
-            csv_buffer.seek(0)
+            # CSV export via the stdlib writer - all cells are strings,
+            # so this skips pandas' per-cell formatter (to_csv has no
+            # pyarrow engine to delegate to)
+            csv_text = StringIO()
+            csv_writer = csv.writer(csv_text, lineterminator='\n')
+            csv_writer.writerow(edited_df.columns)
+            # fillna: cleared editor cells surface as NA under the
+            # Arrow-backed and category dtypes and must export as
+            # empty strings
+            csv_writer.writerows(
+                edited_df.fillna('').itertuples(index=False, name=None))
+            csv_buffer = BytesIO(csv_text.getvalue().encode('utf-8-sig'))
             
             st.download_button(
                 label="💾 Скачать CSV",
@@ -328,7 +479,7 @@ with tab2:
         with col2:
             # XLSX export
             xlsx_buffer = BytesIO()
-            with pd.ExcelWriter(xlsx_buffer, engine='openpyxl') as writer:
+            with pd.ExcelWriter(xlsx_buffer, engine=EXCEL_ENGINE) as writer:
                 edited_df.to_excel(writer, index=False, sheet_name='Препродакшн-таблица')
             xlsx_buffer.seek(0)
             